@@ -1,9 +1,14 @@
 import pygame
 import threading
+import itertools
 import time
 import random
 import sys
 
+# Clock for race timing. monotonic() is cheap to call and never jumps if
+# the system clock gets changed mid race like time.time() can
+_now = time.monotonic
+
 # GLOBAL CONSTANTS - Game Configuration
 
 # Window dimensions
@@ -28,6 +33,15 @@ NUM_OBSTACLES = 8
 NUM_POWERUPS = 6
 BASE_SPEED = 2
 SPEED_VARIANCE = 1
+FPS = 60  # speeds are tuned in pixels per frame at this rate
+LANE_CHANGE_FRAMES = 12  # frames between player lane changes (0.2 s at 60 FPS)
+JITTER_SIZE = 256  # entries in the speed jitter table (power of two, indexed with a mask)
+MAX_DT = 0.05  # longest step (seconds) a car takes in one go, so it cant jump over an obstacle
+
+# Lane geometry never changes, so work out the y for each lane once
+CAR_LANE_Y = tuple(lane * LANE_HEIGHT + (LANE_HEIGHT - CAR_HEIGHT) // 2 for lane in range(TRACK_LANES))
+OBSTACLE_LANE_Y = tuple(lane * LANE_HEIGHT + (LANE_HEIGHT - OBSTACLE_SIZE) // 2 for lane in range(TRACK_LANES))
+POWERUP_LANE_Y = tuple(lane * LANE_HEIGHT + (LANE_HEIGHT - POWERUP_SIZE) // 2 for lane in range(TRACK_LANES))
 
 # Colors
 WHITE = (255, 255, 255)
@@ -45,18 +59,34 @@ GOLD = (255, 215, 0)
 # Car colors
 CAR_COLORS = [RED, GREEN, BLUE, YELLOW]
 
+# Menu text
+MENU_INSTRUCTIONS = [
+    "SPACE - Start Race",
+    "Arrow Keys - Control Red Car (Player)",
+    "P - Pause/Resume",
+    "R - Reset",
+    "",
+    "Power-ups: Gold=Speed, Purple=Shield",
+    "Orange Squares = Obstacles"
+]
+
 
 # CAR CLASS by Nicholas Keane
-# Represents individual race car with its own thread
+# Represents individual race car, driven by its own worker thread
 
 # Nick wrote this
 class Car:
-    #  Car object that runs in its own thread. Thread Safety: - Position updates protected by game state lock - Movement controlled by pause event - Thread-safe flag checking for race completion 
+    #  Car object that is moved by its own worker thread. Thread Safety: - Position is only ever written by the thread driving this car, so it needs no lock (it moves forward, except for a half-step bump back off an obstacle) - Movement steps once per frame tick on frame_cv, so pausing just stops the ticks - race_active Event and winner_token decide when the race is over 
+    # fixed attribute slots instead of a per-car __dict__ (smaller, faster lookups)
+    __slots__ = ('id', 'lane', 'x', 'y', 'color', 'base_speed', 'current_speed',
+                 'finished', 'finish_time', 'is_player',
+                 'hasSpeedBoost', 'speedBoostTimer', 'hasShield', 'shieldTimer')
+
     def __init__(self, car_id, lane, color, is_player=False):
         self.id = car_id
         self.lane = lane
         self.x = START_X
-        self.y = lane * LANE_HEIGHT + (LANE_HEIGHT - CAR_HEIGHT) // 2
+        self.y = CAR_LANE_Y[lane]
         self.color = color
         # base_speed gets small random variance so cars don't look cloned
         self.base_speed = BASE_SPEED + random.uniform(-SPEED_VARIANCE, SPEED_VARIANCE)
@@ -71,17 +101,10 @@ class Car:
         self.hasShield = False
         self.shieldTimer = 0
 
-        # Thread reference
-        self.thread = None
-
-    def get_rect(self):
-        # Returns pygame Rect for collision detection; simple helper
-        return pygame.Rect(self.x, self.y, CAR_WIDTH, CAR_HEIGHT)
-
     # Jared's code
     def powerUpType(self, powerUpType):
-        #  Apply power-up effect to car depending on the powerup. CRITICAL SECTION: Called from car thread and modifies car state. It's rotected by caller's lock 
-        # Apply the given power-up. Note: caller should hold lock when needed.
+        #  Apply power-up effect to car depending on the powerup. THREAD SAFETY: Called after claim_item() with no lock held. That's safe because the thread driving this car is the only one that ever writes its state 
+        # Apply the given power-up (only the car's own thread should call this).
         if powerUpType == "speed":
             self.hasSpeedBoost = True
             self.speedBoostTimer = 1.5  # 1.5 seconds
@@ -113,15 +136,18 @@ class Car:
 # Jared's code
 class Obstacle:
     #  Obstacles will slow down cars when the obstacle is hit unless they have shield 
+    __slots__ = ('x', 'lane', 'y', 'active', 'bounds', 'rect')
+
     def __init__(self, x, lane):
         self.x = x
         self.lane = lane
-        self.y = lane * LANE_HEIGHT + (LANE_HEIGHT - OBSTACLE_SIZE) // 2
+        self.y = OBSTACLE_LANE_Y[lane]
         self.active = True
-
-    def getRectangle(self):
-        # returns a rect for collision checks
-        return pygame.Rect(self.x, self.y, OBSTACLE_SIZE, OBSTACLE_SIZE)
+        # obstacles never move, so work out the collision span once (x0, x1).
+        # y isnt needed, anything in the same lane always overlaps a car in y
+        self.bounds = (self.x, self.x + OBSTACLE_SIZE)
+        # and one Rect for drawing it, so the draw pass doesnt build a new one each frame
+        self.rect = pygame.Rect(self.x, self.y, OBSTACLE_SIZE, OBSTACLE_SIZE)
 
 
 # POWERUP CLASS by Jared Miller
@@ -130,24 +156,25 @@ class Obstacle:
 # Jared's code
 class PowerUp:
     #  Collectible item that can be a speed boost or shield 
+    __slots__ = ('x', 'lane', 'y', 'type', 'active', 'rotation', 'bounds', 'rect')
+
     def __init__(self, x, lane, powerUpType):
         self.x = x
         self.lane = lane
-        self.y = lane * LANE_HEIGHT + (LANE_HEIGHT - POWERUP_SIZE) // 2
+        self.y = POWERUP_LANE_Y[lane]
         self.type = powerUpType  # "speed" or "shield"
         self.active = True
         self.rotation = 0  # For animation
-
-    def getRectangle(self):
-        # rect used for pickup detection
-        return pygame.Rect(self.x, self.y, POWERUP_SIZE, POWERUP_SIZE)
+        # pickup span worked out once since powerups dont move (x0, x1)
+        self.bounds = (self.x, self.x + POWERUP_SIZE)
+        self.rect = pygame.Rect(self.x, self.y, POWERUP_SIZE, POWERUP_SIZE)
 
 
 # GAME CLASS Rendering: David Weaver
 # Main game controller managing all threads and synchronization
 
 class RacingGame:
-    #  Main game class coordinating all threads and managing shared state. SYNCHRONIZATION STRATEGY: - state_lock: Protects all shared game state (mutex) - pause_event: Controls thread execution (event signaling) - race_active: Atomic flag for race status - winner_declared: Atomic flag to prevent multiple winners 
+    #  Main game class coordinating all threads and managing shared state. SYNCHRONIZATION STRATEGY: - car positions: no lock, each car's x is written only by its own thread, once per step - items_lock: Protects obstacle/powerup active flags (mutex) - frame_cv: Condition the main loop notifies once per frame; car threads step once per tick, and pausing stops the ticks (condition variable) - race_cv: Condition the persistent car worker threads sleep on between races (condition variable) - race_active: Event set while the race runs, read without any lock - winner_token: Counter whose first next() wins, so only one winner is ever declared 
     def __init__(self):
         # Initialize pygame
         pygame.init()
@@ -156,32 +183,90 @@ class RacingGame:
         self.clock = pygame.time.Clock()
         self.font = pygame.font.Font(None, 36)
         self.small_font = pygame.font.Font(None, 24)
+        self.track_background = self.build_track_background()
+        # track plus the items still on it, see build_scene()
+        self.scene = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        self.powerup_icons = self.build_powerup_icons()
+        self.car_sprites = self.build_car_sprites()
+        self.boost_marker, self.shield_ring = self.build_car_markers()
+
+        # text that never changes is rendered once here instead of every frame
+        self.title_text = self.font.render("Multi-threaded Racing Game", True, WHITE)
+        self.instruction_texts = [self.small_font.render(line, True, WHITE)
+                                  for line in MENU_INSTRUCTIONS]
+        self.paused_text = self.font.render("PAUSED", True, YELLOW)
+        self.restart_text = self.small_font.render("Press R to restart", True, WHITE)
+        self.you_text = self.small_font.render("YOU", True, WHITE)
 
         # SYNCHRONIZATION PRIMITIVES
-        # Mutex for protecting shared state
-        self.state_lock = threading.Lock()
-
-        # Event for pause/resume functionality
-        self.pause_event = threading.Event()
-        self.pause_event.set()  # Initially not paused
+        # speed jitter for the cars, rolled once here so car threads just read
+        # a table entry per tick instead of calling the RNG (read only, no lock)
+        self.jitter = tuple(random.uniform(0.8, 1.2) for _ in range(JITTER_SIZE))
+
+        # Mutex for picking up obstacles/powerups (only the active flip)
+        self.items_lock = threading.Lock()
+        # items picked up since the last frame, added under items_lock. the
+        # main thread takes them off the list and erases them from the scene
+        self.claimed_items = []
+
+        # Condition for the frame tick: run() bumps frame_count and adds the
+        # frame's dt to frame_time, then wakes the car threads. While paused
+        # no ticks go out, so the cars just stay in their one wait_for
+        # (frame_count, frame_time and paused are guarded by frame_cv)
+        self.frame_cv = threading.Condition()
+        self.frame_count = 0
+        self.frame_time = 0.0
+        self.paused = False
 
         # Atomic flags
-        self.race_active = False
-        self.winner_declared = False
-
-        # SHARED GAME STATE (Protected by state_lock)
+        # race_active is an Event so car threads can check it with a plain
+        # is_set(), and winner_token hands out 0 exactly once (next() on an
+        # itertools.count is atomic under the GIL)
+        self.race_active = threading.Event()
+        self.winner_token = itertools.count()
+
+        # Condition the car worker threads wait on between races: start_race
+        # bumps race_number to send them off, each worker takes one off
+        # busy_workers when its race loop returns, and closing tells them to
+        # exit for good (all guarded by race_cv)
+        self.race_cv = threading.Condition()
+        self.race_number = 0
+        self.busy_workers = 0
+        self.closing = False
+        self.car_workers = []
+
+        # SHARED GAME STATE (only reset while the car workers are idle)
         self.cars = []
-        self.obstacles = []
-        self.powerups = []
+        self.obstacles_by_lane = []  # obstacles/powerups still on the track, per lane
+        self.powerups_by_lane = []
         self.winner = None
         self.race_start_time = None
         self.race_time = 0
         self.game_state = "menu"  # menu, racing, paused, finished
 
+        # held state of the player's keys, kept up to date from KEYDOWN/KEYUP
+        # events in run() so we dont need pygame.key.get_pressed() every frame
+        self.keys_down = {pygame.K_RIGHT: False, pygame.K_UP: False, pygame.K_DOWN: False}
+        self.last_lane_change_frame = 0  # frame_count of the last lane change
+
+        # game_state the screen was last drawn in, see needs_redraw()
+        self.last_drawn_state = None
+        # whether an AI car was still driving last frame, see needs_redraw()
+        self.workers_were_busy = False
+        # screen areas the cars and timer covered last frame, erased next frame
+        self.dirty_rects = []
+
+        # text that changes now and then, only re-rendered when it does.
+        # the race timer shows tenths, so it only needs a new surface 10x a second
+        self.timer_tenths = None
+        self.timer_text = None
+        self.winner_texts = None  # (winner, name surface, time surface)
+
         self.initialize_game_objects()
+        self.start_car_workers()
 
     def initialize_game_objects(self):
-        #  Initialize all game objects: cars, obstacles, powerups. THREAD SAFETY: Called only from main thread during setup No lock needed as no other threads are running yet 
+        #  Initialize all game objects: cars, obstacles, powerups. THREAD SAFETY: Called only from main thread, either before the car workers are started or from reset_game() once they are all idle between races. Idle workers just sleep on race_cv and touch no game state, so no lock is needed 
         # Setup cars, obstacles, and powerups. Keep first car as player.
         self.cars = []
         for i in range(NUM_CARS):
@@ -190,148 +275,257 @@ class RacingGame:
             self.cars.append(car)
 
         # Create obstacles at random positions
-        self.obstacles = []
-        for i in range(NUM_OBSTACLES):
-            x = random.randint(START_X + 150, FINISH_LINE_X - 150)
-            lane = random.randint(0, TRACK_LANES - 1)
-            self.obstacles.append(Obstacle(x, lane))
-
-        # Create power-ups at random positions
-        self.powerups = []
-        for i in range(NUM_POWERUPS):
-            x = random.randint(START_X + 200, FINISH_LINE_X - 200)
-            lane = random.randint(0, TRACK_LANES - 1)
-            powerUpType = random.choice(["speed", "shield"])
-            self.powerups.append(PowerUp(x, lane, powerUpType))
+        # obstacles_by_lane buckets them so a car only checks its own lane
+        self.obstacles_by_lane = [[] for _ in range(TRACK_LANES)]
+        # draw all the random x's and lanes in one batch each instead of
+        # two randint calls per obstacle
+        xs = random.choices(range(START_X + 150, FINISH_LINE_X - 150 + 1), k=NUM_OBSTACLES)
+        lanes = random.choices(range(TRACK_LANES), k=NUM_OBSTACLES)
+        for x, lane in zip(xs, lanes):
+            self.obstacles_by_lane[lane].append(Obstacle(x, lane))
+
+        # Create power-ups at random positions (bucketed by lane too)
+        self.powerups_by_lane = [[] for _ in range(TRACK_LANES)]
+        xs = random.choices(range(START_X + 200, FINISH_LINE_X - 200 + 1), k=NUM_POWERUPS)
+        lanes = random.choices(range(TRACK_LANES), k=NUM_POWERUPS)
+        types = random.choices(["speed", "shield"], k=NUM_POWERUPS)
+        for x, lane, powerUpType in zip(xs, lanes, types):
+            self.powerups_by_lane[lane].append(PowerUp(x, lane, powerUpType))
+
+        # keep each lane sorted left to right so collision scans can stop
+        # at the first item past the front of the car
+        for lane in range(TRACK_LANES):
+            self.obstacles_by_lane[lane].sort(key=lambda item: item.x)
+            self.powerups_by_lane[lane].sort(key=lambda item: item.x)
 
     def reset_game(self):
-        #  Reset game to initial state. CRITICAL SECTION: Must ensure all threads are stopped before reset 
-        # Stop race and try to gracefully join threads, then re-init objects.
-        self.race_active = False
-        self.pause_event.set()  # Wake up any paused threads so they can exit
-
-        # Wait for all threads to finish
-        for car in self.cars:
-            if car.thread and car.thread.is_alive():
-                car.thread.join(timeout=1.0)
-
-        # Reset state under lock
-        with self.state_lock:
-            self.winner_declared = False
-            self.winner = None
-            self.race_start_time = None
-            self.race_time = 0
-            self.initialize_game_objects()
+        #  Reset game to initial state. CRITICAL SECTION: The car workers stay alive, so stop_race() must first wait for all of them to go idle. An idle worker is asleep on race_cv and doesnt read the cars until the next start_race(), so replacing them here is safe 
+        # Stop race and wait for the car workers to go idle, then re-init objects.
+        self.stop_race()
+
+        # every worker is idle now, so the main thread is the only one left
+        # touching this state and no lock is needed
+        self.winner_token = itertools.count()
+        self.winner = None
+        self.race_start_time = None
+        self.race_time = 0
+        self.initialize_game_objects()
+        # the old race's pickups and screen belong to the old scene, so drop
+        # them and have the next frame draw everything from scratch
+        self.claimed_items = []
+        self.dirty_rects = []
+        self.last_drawn_state = None
 
         self.game_state = "menu"
 
+    def start_car_workers(self):
+        #  Create one worker thread per AI car slot. THREAD CREATION: Done once for the life of the game; races just wake the workers instead of spawning new threads 
+        # hand each worker the race number from right now, so a race started
+        # before the thread gets going still counts as new for it
+        with self.race_cv:
+            race_seen = self.race_number
+        for slot, car in enumerate(self.cars):
+            if not car.is_player:  # AI-controlled cars
+                worker = threading.Thread(target=self.car_worker, args=(slot, race_seen), daemon=True)
+                worker.start()
+                self.car_workers.append(worker)
+
+    def car_worker(self, slot, race_seen):
+        #  Persistent thread for one AI car slot. Sleeps on race_cv until start_race sends it off (race_number moves past race_seen), drives whatever car is in its slot that race, then goes back to sleep. Exits when closing is set 
+        while True:
+            with self.race_cv:
+                self.race_cv.wait_for(lambda: self.race_number != race_seen or self.closing)
+                if self.closing:
+                    return
+                race_seen = self.race_number
+                car = self.cars[slot]
+
+            try:
+                self.car_movement_thread(car)
+            finally:
+                # let stop_race know this worker is done with the race
+                with self.race_cv:
+                    self.busy_workers -= 1
+                    self.race_cv.notify_all()
+
+    def stop_race(self, timeout=None):
+        #  Stop the race and wait for the car workers to finish it. SIGNALING: Clears race_active, then wakes every thread waiting on frame_cv (paused or not) so they see it and leave their race loop. Returns False if timeout ran out with a worker still busy 
+        self.race_active.clear()
+        with self.frame_cv:
+            self.paused = False
+            self.frame_cv.notify_all()  # Wake up any waiting threads so they can stop
+
+        # Wait for all workers to be back to idle before anyone touches the cars.
+        # each one leaves its race loop within a tick of being woken, so reset
+        # waits it out fully; giving up early would let a late worker count
+        # itself off busy_workers after the next race already set it
+        with self.race_cv:
+            return self.race_cv.wait_for(lambda: self.busy_workers == 0, timeout)
+
+    def stop_car_workers(self):
+        #  Tell the idle car workers to exit and join them. Only used when the game is closing 
+        with self.race_cv:
+            self.closing = True
+            self.race_cv.notify_all()
+
+        for worker in self.car_workers:
+            worker.join(timeout=1.0)
+
+    def advance_frame(self, dt):
+        #  Publish one frame tick to the car threads. CRITICAL SECTION: frame_count/frame_time are written here under frame_cv and read by car threads under it. Does nothing while paused, so paused time never reaches the cars. dt is clamped to MAX_DT so a hitch (like dragging the window) doesnt turn into one giant step 
+        dt = min(dt, MAX_DT)
+        with self.frame_cv:
+            if self.paused:
+                return
+            self.frame_count += 1
+            self.frame_time += dt
+            self.frame_cv.notify_all()
+
     def start_race(self):
-        #  Start the race by creating and starting all car threads. THREAD CREATION: Spawns one thread per car Each thread runs the car_movement_thread function 
-        # Move game into racing state and spawn threads for AI cars.
+        #  Start the race by waking the car worker threads. SIGNALING: race_active is set before race_number is bumped, so every worker sees the race running when it wakes. Each worker runs car_movement_thread for the car in its slot 
+        # Move game into racing state and send the AI car workers off.
         self.game_state = "racing"
-        self.race_active = True
-        self.winner_declared = False
-        self.race_start_time = time.time()
-        self.pause_event.set()
+        self.winner_token = itertools.count()
+        self.race_active.set()
+        self.race_start_time = _now()
+        with self.frame_cv:
+            self.paused = False
 
-        # Create and start a thread for each car
-        for car in self.cars:
-            if not car.is_player:  # AI-controlled cars
-                car.thread = threading.Thread(
-                    target=self.car_movement_thread,
-                    args=(car,),
-                    daemon=True
-                )
-                car.thread.start()
+        with self.race_cv:
+            self.race_number += 1
+            self.busy_workers = len(self.car_workers)
+            self.race_cv.notify_all()
 
     def check_car_collision(self, car, new_x):
-        #  Check if moving to new_x would cause collision with another car. Must be called with state_lock held. Returns True if collision would occur, False otherwise. 
-        # Produce a rect at the candidate new_x and test collisions with other cars in same lane.
-        test_rect = pygame.Rect(new_x, car.y, CAR_WIDTH, CAR_HEIGHT)
+        #  Check if moving to new_x would cause collision with another car. Returns True if collision would occur, False otherwise. THREAD SAFETY: Needs no lock. Each car's x is only written by the one thread driving it, a single float store per step (forward, or half a step back after hitting an obstacle). So another car's x read here is at most one step stale: it can block us for a tick it no longer should, or let us creep up to half a step into a car that was just bumped back. Either way the next tick reads the fresh x and sorts it out 
+        # Cars in the same lane line up exactly, so only the x ranges need to overlap.
+        right = new_x + CAR_WIDTH
         for other_car in self.cars:
             if other_car.id == car.id:
                 continue
             if other_car.lane == car.lane:
-                other_rect = other_car.get_rect()
-                if test_rect.colliderect(other_rect):
+                other_x = other_car.x
+                if new_x < other_x + CAR_WIDTH and other_x < right:
                     return True
         return False
 
+    def claim_item(self, item, items_by_lane):
+        #  Deactivate an obstacle or powerup and drop it from its lane bucket. CRITICAL SECTION: the active flip and bucket swap are under items_lock. Returns True if this caller took the item, False if another car got it first. 
+        with self.items_lock:
+            if item.active:
+                item.active = False
+                # swap in a new list without it (instead of removing in place)
+                # so a thread scanning the old list right now isnt disturbed
+                items_by_lane[item.lane] = [other for other in items_by_lane[item.lane]
+                                            if other is not item]
+                self.claimed_items.append(item)
+                return True
+        return False
+
+    def check_track_items(self, car, move_distance):
+        #  Apply obstacles and powerups in the car's lane after it moved. THREAD SAFETY: Runs without a lock; item positions never change and only the car's own thread writes its x/speed/shield, so claim_item() is the only step that locks. Buckets only hold items still on the track, so used ones cost nothing. 
+        # items are bucketed by lane and centered in it like the cars, so they
+        # always overlap in y and only the x spans need testing.
+        # lanes are sorted by x, so once an item starts past the car's front
+        # nothing after it can touch the car either
+        left, lane = car.x, car.lane
+        right = left + CAR_WIDTH
+        for obstacle in self.obstacles_by_lane[lane]:
+            x0, x1 = obstacle.bounds
+            if x0 >= right:
+                break
+            if obstacle.active and left < x1:
+                # obstacle disappears after hit, whoever claims it gets bumped
+                if self.claim_item(obstacle, self.obstacles_by_lane) and not car.hasShield:
+                    # bump back the car a bit when hit something
+                    car.x -= move_distance * 0.5
+
+        for powerup in self.powerups_by_lane[lane]:
+            x0, x1 = powerup.bounds
+            if x0 >= right:
+                break
+            if powerup.active and left < x1:
+                if self.claim_item(powerup, self.powerups_by_lane):
+                    car.powerUpType(powerup.type)
+
+    def check_finish(self, car):
+        #  Mark the car finished once it crosses the line. THREAD SAFETY: the first car to take a token from winner_token is the winner, so no lock is needed to keep it to one winner 
+        if car.x >= FINISH_LINE_X and not car.finished:
+            car.finished = True
+            car.finish_time = _now() - self.race_start_time
+
+            # set the winner if not set yet (only the first token is 0)
+            if next(self.winner_token) == 0:
+                self.winner = car
+                self.game_state = "finished"
+
     # Thomas's code (modified with car collision detection)
     def car_movement_thread(self, car):
         # this function runs in a thread to make the cars move by themself
-        last_update = time.time()
-
-        while self.race_active and not car.finished:
-            # if game paused, just wait here till resume
-            self.pause_event.wait()
-
-            # figuring out how much time passed since last frame
-            current_time = time.time()
-            dt = current_time - last_update
-            last_update = current_time
+        # it steps once per frame tick from the main loop instead of sleeping
+
+        # grab everything the loop uses every tick as locals once, so each
+        # tick does fast local lookups instead of self./global ones
+        frame_cv = self.frame_cv
+        is_racing = self.race_active.is_set
+        jitter = self.jitter
+        jitter_mask = JITTER_SIZE - 1
+        car_id = car.id
+        check_car_collision = self.check_car_collision
+        check_track_items = self.check_track_items
+        check_finish = self.check_finish
+        fps = FPS
+        max_dt = MAX_DT
+
+        with frame_cv:
+            last_frame = self.frame_count
+            last_time = self.frame_time
+
+        while is_racing() and not car.finished:
+            # wait for the main loop to finish a new frame (or the race to stop).
+            # if game paused, no new frames come so we just wait here till resume
+            with frame_cv:
+                frame_cv.wait_for(lambda: self.frame_count != last_frame or not is_racing())
+                last_frame = self.frame_count
+                # game time since our last step, covers frames we slept through
+                # (clamped too, a huge step could skip right past an obstacle)
+                dt = min(self.frame_time - last_time, max_dt)
+                last_time = self.frame_time
+
+            # woken up because the race stopped, dont take a step
+            if not is_racing():
+                break
 
             # update the powerups for this car (only affects this car)
             car.updatePowerUps(dt)
 
             # make car speed vary a bit so it dont look too robotic
-            speed_multiplier = random.uniform(0.8, 1.2)
-            move_distance = car.current_speed * speed_multiplier
-
-            # lock shared game data so cars dont mess each other up
-            with self.state_lock:
-                if not self.race_active:
-                    break
-
-                # Calculate new position
-                new_x = car.x + move_distance
-
-                # Check for car-to-car collision
-                if self.check_car_collision(car, new_x):
-                    # Can't move forward, another car is blocking
-                    # Stay at current position or move slightly back
-                    new_x = car.x
-                else:
-                    # move the car ahead by the distance we calc'd
-                    car.x = new_x
-
-                # check if car hits any obstacles
-                car_rect = car.get_rect()
-                for obstacle in self.obstacles:
-                    if obstacle.active and car_rect.colliderect(obstacle.getRectangle()):
-                        if not car.hasShield:
-                            # bump back the car a bit when hit something
-                            car.x -= move_distance * 0.5
-                        obstacle.active = False  # obstacle disappears after hit
-
-                # check powerups collision
-                for powerup in self.powerups:
-                    if powerup.active and car_rect.colliderect(powerup.getRectangle()):
-                        # apply the powerup to car
-                        car.powerUpType(powerup.type)
-                        powerup.active = False
-
-                # if car reaches the end line
-                if car.x >= FINISH_LINE_X and not car.finished:
-                    car.finished = True
-                    car.finish_time = time.time() - self.race_start_time
-
-                    # set the winner if not set yet (only once)
-                    if not self.winner_declared:
-                        self.winner_declared = True
-                        self.winner = car
-                        self.game_state = "finished"
-
-            # slow down the loop to kinda match 60fps update
-            time.sleep(0.016)
+            # scale by dt so a late wakeup doesnt make the car slower
+            # (offset by car id so the cars dont all speed up on the same frame)
+            speed_multiplier = jitter[(last_frame + car_id) & jitter_mask]
+            move_distance = car.current_speed * speed_multiplier * dt * fps
+
+            # Calculate new position
+            # no lock needed, only this thread ever writes car.x (see check_car_collision)
+            new_x = car.x + move_distance
+
+            # Check for car-to-car collision
+            # if another car is blocking, just stay where we are
+            if not check_car_collision(car, new_x):
+                # move the car ahead by the distance we calc'd
+                car.x = new_x
+
+            # obstacles, powerups and the finish line
+            check_track_items(car, move_distance)
+            check_finish(car)
 
     # Thomas's code (modified with car collision detection)
     def handle_player_input(self):
         # checks for key presses to control the player car
-        if self.game_state != "racing" or not self.race_active:
+        if self.game_state != "racing" or not self.race_active.is_set():
             return
 
-        keys = pygame.key.get_pressed()
+        keys = self.keys_down
         player_car = self.cars[0]
 
         if player_car.finished:
@@ -341,192 +535,288 @@ class RacingGame:
         dt = self.clock.get_time() / 1000.0
         player_car.updatePowerUps(dt)
 
-        # lock stuff so two things dont change car at same time
-        with self.state_lock:
-            # move right if pressing arrow
-            if keys[pygame.K_RIGHT]:
-                move_distance = player_car.current_speed * 1.5
-                new_x = player_car.x + move_distance
-
-                # Check for car collision before moving
-                if not self.check_car_collision(player_car, new_x):
-                    player_car.x = new_x
-
-                    # check if hit obstacle
-                    car_rect = player_car.get_rect()
-                    for obstacle in self.obstacles:
-                        if obstacle.active and car_rect.colliderect(obstacle.getRectangle()):
-                            if not player_car.hasShield:
-                                # kinda push car back when hit
-                                player_car.x -= move_distance * 0.5
-                            obstacle.active = False
-
-                    # check if get powerup
-                    for powerup in self.powerups:
-                        if powerup.active and car_rect.colliderect(powerup.getRectangle()):
-                            player_car.powerUpType(powerup.type)
-                            powerup.active = False
-
-                    # see if player reach finish
-                    if player_car.x >= FINISH_LINE_X and not player_car.finished:
-                        player_car.finished = True
-                        player_car.finish_time = time.time() - self.race_start_time
-
-                        if not self.winner_declared:
-                            self.winner_declared = True
-                            self.winner = player_car
-                            self.game_state = "finished"
-
-            # move up/down for lane change
-            if keys[pygame.K_UP] and player_car.lane > 0:
-                player_car.lane -= 1
-                player_car.y = player_car.lane * LANE_HEIGHT + (LANE_HEIGHT - CAR_HEIGHT) // 2
-                time.sleep(0.2)  # delay so cant spam switch too fast
-
-            if keys[pygame.K_DOWN] and player_car.lane < TRACK_LANES - 1:
-                player_car.lane += 1
-                player_car.y = player_car.lane * LANE_HEIGHT + (LANE_HEIGHT - CAR_HEIGHT) // 2
-                time.sleep(0.2)
+        # move right if pressing arrow
+        if keys[pygame.K_RIGHT]:
+            move_distance = player_car.current_speed * 1.5
+            new_x = player_car.x + move_distance
+
+            # Check for car collision before moving (the main thread is
+            # the only writer of the player car, so no lock here either)
+            if not self.check_car_collision(player_car, new_x):
+                player_car.x = new_x
+
+                # obstacles, powerups and finish only matter if we actually moved
+                self.check_track_items(player_car, move_distance)
+                self.check_finish(player_car)
+
+        # move up/down for lane change, but wait a few frames between
+        # changes so cant spam switch too fast (without stalling the main loop)
+        if self.frame_count - self.last_lane_change_frame < LANE_CHANGE_FRAMES:
+            return
+
+        lane = player_car.lane
+        if keys[pygame.K_UP] and lane > 0:
+            lane -= 1
+        if keys[pygame.K_DOWN] and lane < TRACK_LANES - 1:
+            lane += 1
+
+        if lane != player_car.lane:
+            # AI threads only read our lane (a single attribute), so no lock needed
+            player_car.lane = lane
+            player_car.y = CAR_LANE_Y[lane]
+            self.last_lane_change_frame = self.frame_count
 
     # Thomas's code
     def toggle_pause(self):
         # pause or resume the race, depending on what it is right now
         if self.game_state == "racing":
-            if self.pause_event.is_set():
-                # pause the race
-                self.pause_event.clear()
-                self.game_state = "paused"
-            else:
-                # unpause and go back to racing
-                self.pause_event.set()
-                self.game_state = "racing"
+            # pause the race (advance_frame stops ticking the cars)
+            with self.frame_cv:
+                self.paused = True
+            self.game_state = "paused"
+
+        elif self.game_state == "paused":
+            # unpause and go back to racing
+            with self.frame_cv:
+                self.paused = False
+                self.frame_cv.notify_all()
+            self.game_state = "racing"
 
     # David's code
-    def draw_track(self): # im doing snake case since a lot of the code is like that
-        # draw the track background and lines
-        self.screen.fill(GRAY)
+    def build_track_background(self):
+        # the track never changes, so draw it once onto its own surface
+        background = pygame.Surface((WINDOW_WIDTH, WINDOW_HEIGHT)).convert()
+        background.fill(GRAY)
 
         # draw white lines between lanes
         for i in range(1, TRACK_LANES):
             y = i * LANE_HEIGHT
-            pygame.draw.line(self.screen, WHITE, (0, y), (WINDOW_WIDTH, y), 2)
+            pygame.draw.line(background, WHITE, (0, y), (WINDOW_WIDTH, y), 2)
 
         # start line on left
-        pygame.draw.line(self.screen, GREEN, (START_X, 0), (START_X, WINDOW_HEIGHT), 4)
+        pygame.draw.line(background, GREEN, (START_X, 0), (START_X, WINDOW_HEIGHT), 4)
 
         # finish line (checker pattern)
         for i in range(0, WINDOW_HEIGHT, 20):
             color = WHITE if (i // 20) % 2 == 0 else BLACK
-            pygame.draw.rect(self.screen, color, (FINISH_LINE_X, i, 20, 20))
+            pygame.draw.rect(background, color, (FINISH_LINE_X, i, 20, 20))
+
+        return background
+
+    # David's code
+    def build_powerup_icons(self):
+        # every speed powerup looks the same (and every shield one), so draw
+        # each icon once onto a see-through surface and just blit it later
+        center = (POWERUP_SIZE // 2, POWERUP_SIZE // 2)
+        icons = {}
+
+        speed = pygame.Surface((POWERUP_SIZE, POWERUP_SIZE), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.circle(speed, GOLD, center, POWERUP_SIZE // 2)
+        # lightning shape kinda thing
+        points = [(12, 5), (15, 12), (13, 12), (16, 20), (10, 13), (12, 13)]
+        pygame.draw.polygon(speed, WHITE, points)
+        icons["speed"] = speed
+
+        shield = pygame.Surface((POWERUP_SIZE, POWERUP_SIZE), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.circle(shield, PURPLE, center, POWERUP_SIZE // 2)
+        # circle shield shape
+        pygame.draw.circle(shield, WHITE, center, POWERUP_SIZE // 3, 2)
+        icons["shield"] = shield
+
+        return icons
+
+    def build_car_sprites(self):
+        # a car is just a colored box with a black border, so draw one per
+        # color up front and blit it instead of two draw.rect calls per car
+        sprites = {}
+        for color in CAR_COLORS:
+            sprite = pygame.Surface((CAR_WIDTH, CAR_HEIGHT)).convert()
+            sprite.fill(color)
+            pygame.draw.rect(sprite, BLACK, (0, 0, CAR_WIDTH, CAR_HEIGHT), 2)
+            sprites[color] = sprite
+        return sprites
+
+    def build_car_markers(self):
+        # the boost dot and the shield ring look the same on every car too.
+        # the ring is bigger than the car, so it has its own surface centered on it
+        boost = pygame.Surface((10, 10), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.circle(boost, GOLD, (5, 5), 5)
+
+        size = CAR_HEIGHT * 2 + 1
+        shield = pygame.Surface((size, size), pygame.SRCALPHA).convert_alpha()
+        pygame.draw.circle(shield, PURPLE, (CAR_HEIGHT, CAR_HEIGHT), CAR_HEIGHT, 2)
+
+        return boost, shield
+
+    def take_claimed_items(self):
+        # hand back the items picked up since last time and start a new list
+        if not self.claimed_items:
+            return []
+        with self.items_lock:
+            claimed, self.claimed_items = self.claimed_items, []
+        return claimed
+
+    def draw_items(self, lanes):
+        # draw the obstacles and powerups still on the track in these lanes
+        # onto the scene. the lane buckets only hold active items, and a
+        # claim swaps in a new list, so reading them needs no lock
+        scene = self.scene
+        draw_rect = pygame.draw.rect
+        for lane in lanes:
+            for obstacle in self.obstacles_by_lane[lane]:
+                draw_rect(scene, ORANGE, obstacle.rect)
+                draw_rect(scene, BLACK, obstacle.rect, 2)
+
+        # draw the powerups (icon with its small symbol is prebuilt)
+        powerup_icons = self.powerup_icons
+        for lane in lanes:
+            for powerup in self.powerups_by_lane[lane]:
+                scene.blit(powerup_icons[powerup.type], powerup.rect)
+
+    def build_scene(self):
+        # the track and the items on it only change when an item gets picked
+        # up, so draw them onto one surface that frames can just copy from.
+        # anything claimed from here on is still erased later by erase_item()
+        self.take_claimed_items()
+        self.scene.blit(self.track_background, (0, 0))
+        self.draw_items(range(TRACK_LANES))
+
+    def erase_item(self, item):
+        # rub a picked up item off the scene by copying the bare track over it.
+        # items in a lane can overlap, so draw whatever is left in that lane
+        # back in, clipped to the spot so nothing else gets touched
+        scene = self.scene
+        scene.blit(self.track_background, item.rect, item.rect)
+        scene.set_clip(item.rect)
+        self.draw_items((item.lane,))
+        scene.set_clip(None)
+
+    # David's code
+    def draw_track(self): # im doing snake case since a lot of the code is like that
+        # draw the track with its obstacles and powerups (one blit of the scene)
+        self.build_scene()
+        self.screen.blit(self.scene, (0, 0))
 
     # David's code
     def draw_game_objects(self):
-        # draw all the stuff on screen
-        with self.state_lock:
-            # draw each obstacle
-            for obstacle in self.obstacles:
-                if obstacle.active:
-                    pygame.draw.rect(self.screen, ORANGE,
-                                     (obstacle.x, obstacle.y, OBSTACLE_SIZE, OBSTACLE_SIZE))
-                    pygame.draw.rect(self.screen, BLACK,
-                                     (obstacle.x, obstacle.y, OBSTACLE_SIZE, OBSTACLE_SIZE), 2)
-
-            # draw the powerups
-            for powerup in self.powerups:
-                if powerup.active:
-                    color = GOLD if powerup.type == "speed" else PURPLE
-                    pygame.draw.circle(self.screen, color,
-                                       (int(powerup.x + POWERUP_SIZE // 2),
-                                        int(powerup.y + POWERUP_SIZE // 2)),
-                                       POWERUP_SIZE // 2)
-
-                    # draw a small icon on it so we know what it is
-                    if powerup.type == "speed":
-                        # lightning shape kinda thing
-                        points = [(powerup.x + 12, powerup.y + 5),
-                                  (powerup.x + 15, powerup.y + 12),
-                                  (powerup.x + 13, powerup.y + 12),
-                                  (powerup.x + 16, powerup.y + 20),
-                                  (powerup.x + 10, powerup.y + 13),
-                                  (powerup.x + 12, powerup.y + 13)]
-                        pygame.draw.polygon(self.screen, WHITE, points)
-                    else:
-                        # circle shield shape
-                        pygame.draw.circle(self.screen, WHITE,
-                                           (int(powerup.x + POWERUP_SIZE // 2),
-                                            int(powerup.y + POWERUP_SIZE // 2)),
-                                           POWERUP_SIZE // 3, 2)
-
-            # draw car
-            for car in self.cars:
-                pygame.draw.rect(self.screen, car.color,
-                                 (int(car.x), int(car.y), CAR_WIDTH, CAR_HEIGHT))
-                pygame.draw.rect(self.screen, BLACK,
-                                 (int(car.x), int(car.y), CAR_WIDTH, CAR_HEIGHT), 2)
-
-                # little circles to show active boosts
-                if car.hasSpeedBoost:
-                    pygame.draw.circle(self.screen, GOLD,
-                                       (int(car.x + CAR_WIDTH - 5), int(car.y + 5)), 5)
-                if car.hasShield:
-                    pygame.draw.circle(self.screen, PURPLE,
-                                       (int(car.x + CAR_WIDTH // 2), int(car.y + CAR_HEIGHT // 2)),
-                                       CAR_HEIGHT, 2)
-
-                # label the player car
-                if car.is_player:
-                    text = self.small_font.render("YOU", True, WHITE)
-                    self.screen.blit(text, (int(car.x), int(car.y - 20)))
+        # draw the cars on top of the scene, returns the screen areas drawn
+        # copy what we need once up front, no lock: every field is a single
+        # attribute read, and a car thats half a tick stale for one frame
+        # just gets drawn where it was a moment ago.
+        cars = [(int(c.x), int(c.y), c.color, c.hasSpeedBoost, c.hasShield, c.is_player)
+                for c in self.cars]
+
+        # bind what the loop below uses over and over to locals once
+        blit = self.screen.blit
+        car_sprites = self.car_sprites
+        boost_marker = self.boost_marker
+        shield_ring = self.shield_ring
+        drawn = []
+        mark = drawn.append
+
+        # draw car (prebuilt sprite for its color)
+        for x, y, color, hasSpeedBoost, hasShield, is_player in cars:
+            mark(blit(car_sprites[color], (x, y)))
+
+            # little circles to show active boosts
+            if hasSpeedBoost:
+                mark(blit(boost_marker, (x + CAR_WIDTH - 10, y)))
+            if hasShield:
+                mark(blit(shield_ring, (x + CAR_WIDTH // 2 - CAR_HEIGHT, y + CAR_HEIGHT // 2 - CAR_HEIGHT)))
+
+            # label the player car
+            if is_player:
+                mark(blit(self.you_text, (x, y - 20)))
+
+        return drawn
 
     # David's code
     def draw_ui(self):
+        # draw the text on top, returns the screen areas that change while racing
+        drawn = []
+
         # race timer
         if self.race_start_time and self.game_state in ["racing", "paused"]:
-            elapsed = time.time() - self.race_start_time
-            timer_text = self.small_font.render(f"Time: {elapsed:.2f}s", True, WHITE)
-            self.screen.blit(timer_text, (10, 10))
+            tenths = int((_now() - self.race_start_time) * 10)
+            if tenths != self.timer_tenths:
+                self.timer_tenths = tenths
+                self.timer_text = self.small_font.render(f"Time: {tenths / 10:.1f}s", True, WHITE)
+            drawn.append(self.screen.blit(self.timer_text, (10, 10)))
 
         # game state
         if self.game_state == "menu":
-            title = self.font.render("Multi-threaded Racing Game", True, WHITE)
-            self.screen.blit(title, (WINDOW_WIDTH // 2 - 250, WINDOW_HEIGHT // 2 - 100))
-
-            instructions = [
-                "SPACE - Start Race",
-                "Arrow Keys - Control Red Car (Player)",
-                "P - Pause/Resume",
-                "R - Reset",
-                "",
-                "Power-ups: Gold=Speed, Purple=Shield",
-                "Orange Squares = Obstacles"
-            ]
+            self.screen.blit(self.title_text, (WINDOW_WIDTH // 2 - 250, WINDOW_HEIGHT // 2 - 100))
 
             y_offset = WINDOW_HEIGHT // 2
-            for instruction in instructions:
-                text = self.small_font.render(instruction, True, WHITE)
+            for text in self.instruction_texts:
                 self.screen.blit(text, (WINDOW_WIDTH // 2 - 200, y_offset))
                 y_offset += 30
 
         elif self.game_state == "paused":
-            text = self.font.render("PAUSED", True, YELLOW)
-            self.screen.blit(text, (WINDOW_WIDTH // 2 - 80, WINDOW_HEIGHT // 2))
+            self.screen.blit(self.paused_text, (WINDOW_WIDTH // 2 - 80, WINDOW_HEIGHT // 2))
 
         elif self.game_state == "finished":
-            with self.state_lock:
-                if self.winner:
-                    winner_text = f"Car {self.winner.id + 1} WINS!"
-                    if self.winner.is_player:
+            # read the winner once; check_finish sets finish_time before it
+            # publishes the winner, so no lock is needed to see a whole winner
+            winner = self.winner
+            if winner:
+                # the finished screen keeps drawing while the AI cars drive in,
+                # so render the winner text once per race
+                if self.winner_texts is None or self.winner_texts[0] is not winner:
+                    winner_text = f"Car {winner.id + 1} WINS!"
+                    if winner.is_player:
                         winner_text = "YOU WIN!"
 
                     text = self.font.render(winner_text, True, GOLD)
-                    self.screen.blit(text, (WINDOW_WIDTH // 2 - 120, WINDOW_HEIGHT // 2 - 50))
-
                     time_text = self.small_font.render(
-                        f"Time: {self.winner.finish_time:.2f}s", True, WHITE)
-                    self.screen.blit(time_text, (WINDOW_WIDTH // 2 - 80, WINDOW_HEIGHT // 2))
+                        f"Time: {winner.finish_time:.2f}s", True, WHITE)
+                    self.winner_texts = (winner, text, time_text)
+
+                _, text, time_text = self.winner_texts
+                self.screen.blit(text, (WINDOW_WIDTH // 2 - 120, WINDOW_HEIGHT // 2 - 50))
+                self.screen.blit(time_text, (WINDOW_WIDTH // 2 - 80, WINDOW_HEIGHT // 2))
+
+                self.screen.blit(self.restart_text,
+                                 (WINDOW_WIDTH // 2 - 100, WINDOW_HEIGHT // 2 + 40))
+
+        return drawn
+
+    def needs_redraw(self):
+        # racing frames always change, but menu/paused/finished screens are
+        # static, so only draw them once when we switch to them (the finished
+        # screen keeps drawing until the last AI car has driven in, plus one
+        # more frame after, since its last step lands after the frame before)
+        busy = self.busy_workers > 0
+        finishing = busy or self.workers_were_busy
+        self.workers_were_busy = busy
+        if self.game_state == "racing" or self.game_state != self.last_drawn_state:
+            return True
+        if self.game_state == "finished":
+            return finishing
+        return False
+
+    def render_frame(self):
+        # while racing only the cars, the timer and picked up items change, so
+        # after the first full frame just patch those spots: erase new pickups
+        # from the scene, put the scene back where things were last frame,
+        # draw them again and only update those areas.
+        # anything else (new screen, window exposed) gets a full redraw and flip
+        if self.game_state == "racing" and self.last_drawn_state == "racing":
+            screen, scene = self.screen, self.scene
+            dirty = self.dirty_rects
+            for item in self.take_claimed_items():
+                self.erase_item(item)
+                dirty.append(item.rect)
+            for rect in dirty:
+                screen.blit(scene, rect, rect)
+            self.dirty_rects = self.draw_game_objects() + self.draw_ui()
+            pygame.display.update(dirty + self.dirty_rects)
+        else:
+            self.draw_track()
+            self.dirty_rects = self.draw_game_objects() + self.draw_ui()
+            pygame.display.flip()
 
-                    restart = self.small_font.render("Press R to restart", True, WHITE)
-                    self.screen.blit(restart, (WINDOW_WIDTH // 2 - 100, WINDOW_HEIGHT // 2 + 40))
+        self.last_drawn_state = self.game_state
 
     def run(self):
         running = True
@@ -537,8 +827,19 @@ class RacingGame:
                 if event.type == pygame.QUIT:
                     running = False
 
+                elif event.type == pygame.VIDEOEXPOSE:
+                    # window got uncovered, draw the screen again
+                    self.last_drawn_state = None
+
+                elif event.type == pygame.KEYUP:
+                    if event.key in self.keys_down:
+                        self.keys_down[event.key] = False
+
                 elif event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_SPACE and self.game_state == "menu":
+                    if event.key in self.keys_down:
+                        self.keys_down[event.key] = True
+
+                    elif event.key == pygame.K_SPACE and self.game_state == "menu":
                         self.start_race()
 
                     elif event.key == pygame.K_p:
@@ -550,21 +851,19 @@ class RacingGame:
             # Handle player input
             self.handle_player_input()
 
-            # Rendering: David
-            self.draw_track()
-            self.draw_game_objects()
-            self.draw_ui()
+            # Tick the AI car threads with how long the last frame took
+            self.advance_frame(self.clock.get_time() / 1000.0)
 
-            pygame.display.flip()
-            self.clock.tick(60)  # 60 FPS
+            # Rendering: David
+            if self.needs_redraw():
+                self.render_frame()
 
-        # Cleanup: Stop all threads before exit
-        self.race_active = False
-        self.pause_event.set()
+            self.clock.tick(FPS)
 
-        for car in self.cars:
-            if car.thread and car.thread.is_alive():
-                car.thread.join(timeout=1.0)
+        # Cleanup: Stop all threads before exit. the workers are daemons, so
+        # if one is somehow still busy after a second we just quit without it
+        if self.stop_race(timeout=1.0):
+            self.stop_car_workers()
 
         pygame.quit()
         sys.exit()